@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面加载耗时对比：默认浏览器配置 vs 快速浏览器配置
+登录一次后，分别用两种配置打开题目列表页和若干题目详情页并计时
+"""
+
+import time
+import argparse
+import statistics
+from scraper import DesunScraper
+
+
+def time_page_loads(scraper, list_url, answer_urls, rounds):
+    """
+    按当前浏览器配置依次打开各页面，返回每个页面的平均耗时（秒）
+
+    返回 (加载耗时, 提取耗时) 两个字典：加载为 driver.get 加上等待，
+    提取为读取详情页中的链接；题目列表页只有加载耗时
+    """
+    load = {list_url: [], **{url: [] for url in answer_urls}}
+    scrape = {url: [] for url in answer_urls}
+    for _ in range(rounds):
+        started = time.perf_counter()
+        scraper.driver.get(list_url)
+        scraper.wait_for("table tr")
+        load[list_url].append(time.perf_counter() - started)
+
+        for url in answer_urls:
+            started = time.perf_counter()
+            scraper.driver.get(url)
+            scraper.wait_for_question_page()
+            loaded = time.perf_counter()
+            scraper.collect_question_links()
+            load[url].append(loaded - started)
+            scrape[url].append(time.perf_counter() - loaded)
+
+    return ({url: statistics.mean(values) for url, values in load.items()},
+            {url: statistics.mean(values) for url, values in scrape.items()})
+
+
+def print_table(title, default_times, fast_times):
+    """打印一组耗时对比"""
+    print(f"\n{title}")
+    print(f"{'页面':<60} {'默认(s)':>10} {'快速(s)':>10} {'节省(s)':>10}")
+    for url in default_times:
+        saved = default_times[url] - fast_times[url]
+        print(f"{url[-60:]:<60} {default_times[url]:>10.3f} {fast_times[url]:>10.3f} {saved:>10.3f}")
+
+    if not default_times:
+        return
+    mean_default = statistics.mean(default_times.values())
+    mean_fast = statistics.mean(fast_times.values())
+    ratio = f"（{(1 - mean_fast / mean_default) * 100:.1f}%）" if mean_default else ""
+    print(f"平均: 默认 {mean_default:.3f}s，快速 {mean_fast:.3f}s，"
+          f"节省 {mean_default - mean_fast:.3f}s{ratio}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比默认与快速浏览器配置的页面加载耗时")
+    parser.add_argument('--url', required=True, help="系统访问URL，例如 http://host/doc")
+    parser.add_argument('--username', help="账号（不填则手动登录）")
+    parser.add_argument('--password', help="密码")
+    parser.add_argument('--pages', type=int, default=5, help="参与测试的题目详情页数量")
+    parser.add_argument('--rounds', type=int, default=3, help="每个页面重复加载次数")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    list_url = f"{base_url}/Main.aspx?tabindex=1&tabid=6"
+
+    # 默认配置：可见浏览器、完整加载、隐式等待
+    default = DesunScraper(base_url=base_url, username=args.username, password=args.password)
+    default.setup_driver()
+    default.login()
+    default.navigate_to_question_list()
+    questions = default.parse_question_list()[:args.pages]
+    answer_urls = [q['answer_url'] for q in questions]
+    cookies = default.driver.get_cookies()
+
+    # 快速配置：无头、eager加载、屏蔽静态资源、显式等待
+    fast = DesunScraper(base_url=base_url, fast=True)
+    fast.setup_driver(headless=True, lightweight=True)
+    fast.apply_cookies(cookies)
+
+    try:
+        # 预热一次，避免首次加载的缓存差异影响结果
+        time_page_loads(default, list_url, answer_urls, 1)
+        time_page_loads(fast, list_url, answer_urls, 1)
+
+        default_load, default_scrape = time_page_loads(default, list_url, answer_urls, args.rounds)
+        fast_load, fast_scrape = time_page_loads(fast, list_url, answer_urls, args.rounds)
+    finally:
+        default.driver.quit()
+        fast.driver.quit()
+
+    # 默认配置的加载耗时包含固定等待1秒，提取耗时在空列表上包含10秒隐式等待，分开报告
+    print_table("页面加载（driver.get + 等待）", default_load, fast_load)
+    print_table("链接提取", default_scrape, fast_scrape)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import re
 import quopri
 import base64
+import html as html_lib
 from email.parser import BytesParser
 from email.policy import default
 from io import BytesIO
@@ -52,6 +53,36 @@ def mht_to_html(mht_bytes: bytes) -> bytes:
         raise ValueError(f"Error converting MHT to HTML: {str(e)}")
 
 
+def html_to_text(html_bytes: bytes) -> bytes:
+    """
+    Extract plain text from an HTML byte stream.
+    
+    Args:
+        html_bytes: UTF-8 HTML byte stream, e.g. the output of mht_to_html
+        
+    Returns:
+        UTF-8 plain text byte stream
+    """
+    text = html_bytes.decode('utf-8', errors='replace')
+    
+    # Drop head, scripts and styles entirely
+    text = re.sub(r'<(head|script|style).*?>.*?</\1>', '', text, flags=re.DOTALL | re.IGNORECASE)
+    
+    # Table cells become tab separated, block elements become line breaks
+    text = re.sub(r'</t[dh]\s*>', '\t', text, flags=re.IGNORECASE)
+    text = re.sub(r'<br\s*/?>|</(p|div|tr|li|h[1-6]|table)\s*>', '\n', text, flags=re.IGNORECASE)
+    
+    # Remove remaining tags and decode entities
+    text = re.sub(r'<[^>]+>', '', text)
+    text = html_lib.unescape(text)
+    
+    # Tidy whitespace line by line
+    lines = [re.sub(r'[ \u3000]+', ' ', line).strip() for line in text.splitlines()]
+    text = '\n'.join(line for line in lines if line)
+    
+    return (text + '\n').encode('utf-8')
+
+
 def simplify_html(html: str) -> str:
     """
     Simplify HTML by removing unnecessary elements while preserving structure and text.
@@ -0,0 +1,233 @@
+import time
+import queue
+import contextlib
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Lower value runs first: requirement and answer files go ahead of reference files
+PRIORITIES = {
+    'requirement': 0,
+    'answer': 0,
+    'reference': 1,
+}
+
+
+class DownloadJob:
+    """
+    A single file waiting to be downloaded.
+
+    Attributes:
+        url: Download URL
+        path: Destination path
+        kind: "requirement", "answer" or "reference"
+        size: Size in bytes from a HEAD probe, or None if unknown
+        done: Bytes received so far, counted as transferred (before decompression)
+        ok: Download result, None until the job has run
+    """
+
+    def __init__(self, url, path, kind):
+        self.url = url
+        self.path = path
+        self.kind = kind
+        self.priority = PRIORITIES.get(kind, max(PRIORITIES.values()) + 1)
+        self.size = None
+        self.done = 0
+        self.ok = None
+
+
+class DownloadScheduler:
+    """
+    Size-aware, priority-ordered download queue.
+
+    Jobs are collected with submit() and executed by run(). Within each
+    priority class the largest files start first and smaller ones fill
+    the remaining gaps (longest-processing-time ordering), so no single
+    large attachment is left running alone at the end of a run.
+    """
+
+    def __init__(self, download, workers=4, session=None, probe_sizes=False, report_interval=5.0,
+                 slots=None, stop_event=None):
+        """
+        Args:
+            download: Callable (url, path, progress) -> bool; progress(nbytes) is
+                called with the bytes transferred for every received chunk, i.e.
+                compressed bytes, matching the Content-Length of a HEAD probe
+            workers: Number of concurrent downloads
+            session: requests.Session used for HEAD probes
+            probe_sizes: Whether to send HEAD requests to learn file sizes
+            report_interval: Minimum seconds between progress reports
+            slots: Semaphore shared with the downloads that also bounds HEAD probes
+            stop_event: threading.Event; once set, workers finish their current
+                file and take no further jobs
+        """
+        self.download = download
+        self.workers = max(1, workers)
+        self.session = session
+        self.probe_sizes = probe_sizes and session is not None
+        self.report_interval = report_interval
+        self.slots = slots
+        self.stop_event = stop_event or threading.Event()
+        self.jobs = []
+        self._lock = threading.Lock()
+        self._started = None
+        self._last_report = 0.0
+
+    def submit(self, url, path, kind):
+        """
+        Queue a file for download.
+
+        Args:
+            url: Download URL
+            path: Destination path
+            kind: "requirement", "answer" or "reference"
+
+        Returns:
+            The queued DownloadJob
+        """
+        job = DownloadJob(url, path, kind)
+        self.jobs.append(job)
+        return job
+
+    def _probe(self, job):
+        """Fill in job.size from the Content-Length of a HEAD response."""
+        if self.stop_event.is_set():
+            return
+        try:
+            with self.slots or contextlib.nullcontext():
+                response = self.session.head(job.url, allow_redirects=True)
+            length = response.headers.get('Content-Length')
+            if response.ok and length and length.isdigit():
+                job.size = int(length)
+        except Exception as e:
+            print(f"获取文件大小失败 {job.url}: {e}")
+
+    def _estimate(self):
+        """Size used for jobs without a known size: median of the known ones, or None."""
+        known = [job.size for job in self.jobs if job.size is not None]
+        return int(statistics.median(known)) if known else None
+
+    def order(self):
+        """
+        Sort pending jobs by priority, then by size descending.
+
+        Returns:
+            The ordered job list
+        """
+        estimate = self._estimate() or 0
+        self.jobs.sort(key=lambda job: (job.priority, -(job.size if job.size is not None else estimate)))
+        return self.jobs
+
+    def remaining_bytes(self):
+        """
+        Bytes still to be received, using estimates for unknown sizes.
+
+        Returns:
+            Remaining byte count, or None while no file size is known yet
+        """
+        estimate = self._estimate()
+        with self._lock:
+            if estimate is None and any(job.size is None for job in self.jobs):
+                return None
+            return sum(max((job.size if job.size is not None else estimate) - job.done, 0)
+                       for job in self.jobs)
+
+    def eta(self):
+        """
+        Estimate seconds left from the observed throughput.
+
+        Returns:
+            Seconds remaining, or None before any bytes have arrived or
+            while no file size is known yet
+        """
+        with self._lock:
+            received = sum(job.done for job in self.jobs)
+        elapsed = time.time() - self._started if self._started else 0
+        remaining = self.remaining_bytes()
+        if not received or not elapsed or remaining is None:
+            return None
+        return remaining / (received / elapsed)
+
+    def _report(self, finished, force=False):
+        now = time.time()
+        if not force and now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+
+        remaining = self.remaining_bytes()
+        eta = self.eta()
+        remaining_text = f"{remaining / 1024 / 1024:.1f} MB" if remaining is not None else "未知"
+        eta_text = f"{eta:.0f}秒" if eta is not None else "未知"
+        print(f"下载进度: {finished}/{len(self.jobs)} 个文件，"
+              f"剩余 {remaining_text}，预计还需 {eta_text}")
+
+    def run(self):
+        """
+        Download every queued job, or until stop_event is set.
+
+        Returns:
+            Dictionary with "ok", "failed", "skipped", "bytes" and "elapsed";
+            skipped jobs keep ok set to None
+        """
+        if not self.jobs:
+            return {'ok': 0, 'failed': 0, 'skipped': 0, 'bytes': 0, 'elapsed': 0.0}
+
+        if self.probe_sizes:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                list(pool.map(self._probe, self.jobs))
+
+        pending = queue.Queue()
+        for job in self.order():
+            pending.put(job)
+
+        self._started = time.time()
+        results = {'ok': 0, 'failed': 0}
+
+        def worker():
+            while not self.stop_event.is_set():
+                try:
+                    job = pending.get_nowait()
+                except queue.Empty:
+                    return
+
+                def progress(nbytes, job=job):
+                    with self._lock:
+                        job.done += nbytes
+
+                ok = self.download(job.url, job.path, progress)
+                job.ok = ok
+                with self._lock:
+                    # The real size replaces any estimate once the file is complete
+                    job.size = job.done
+                    results['ok' if ok else 'failed'] += 1
+                    finished = results['ok'] + results['failed']
+                if finished < len(self.jobs):
+                    self._report(finished)
+
+        threads = [threading.Thread(target=worker, name=f"download-{i}")
+                   for i in range(min(self.workers, len(self.jobs)))]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                # Join with a timeout so Ctrl+C reaches this thread promptly
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            # Let workers finish their current file, then pass the interrupt on
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+            self.jobs = []
+            raise
+
+        results['skipped'] = pending.qsize()
+        if results['skipped']:
+            print(f"下载已停止，{results['skipped']} 个文件未下载")
+        else:
+            self._report(len(self.jobs), force=True)
+        results['bytes'] = sum(job.done for job in self.jobs)
+        results['elapsed'] = round(time.time() - self._started, 2)
+        self.jobs = []
+        return results
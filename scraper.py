@@ -6,33 +6,119 @@
 """
 
 import os
+import sys
+import json
 import time
-import requests
+import hashlib
+import argparse
+import threading
+import contextlib
+import multiprocessing
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 from urllib.parse import urljoin, urlparse
 import re
-from mht2html import mht_to_html
+from concurrent.futures import ProcessPoolExecutor
+from transforms import parse_formats, run_pipeline
+from scheduler import DownloadJob, DownloadScheduler
+from watch import ListingWatcher
+from transport import build_session, copy_driver_cookies, transport_metrics
+from shard import MANIFEST_NAME, parse_shard, in_shard, merge_shards
+
+
+# 快速模式下通过CDP屏蔽的资源：图片、字体、样式表、ASP.NET资源处理程序和统计脚本
+BLOCKED_URL_PATTERNS = [
+    pattern
+    for ext in ("png", "jpg", "jpeg", "gif", "bmp", "ico", "webp", "svg",
+                "woff", "woff2", "ttf", "otf", "eot", "css")
+    # 带版本号的地址（如 site.css?v=3）也要匹配
+    for pattern in (f"*.{ext}", f"*.{ext}?*")
+] + [
+    # ASP.NET 通过处理程序下发的样式、图片和脚本
+    "*WebResource.axd*", "*ScriptResource.axd*",
+    "*google-analytics.com*", "*googletagmanager.com*",
+    "*hm.baidu.com*", "*cnzz.com*", "*51.la*",
+]
 
 
 class DesunScraper:
-    def __init__(self, base_url=None, chromedriver_path=None, output_format="MHT"):
+    def __init__(self, base_url=None, chromedriver_path=None, output_format="MHT",
+                 download_dir=None, username=None, password=None,
+                 interactive=True, download_slots=None, shard=None, fast=False,
+                 transform_workers=0, download_workers=1, probe_sizes=False,
+                 watch_interval=None, http2=False, connect_timeout=10, read_timeout=60,
+                 stop_event=None):
         self.driver = None
         self.base_url = base_url
-        self.session = requests.Session()
-        self.download_dir = os.path.join(os.getcwd(), "downloads")
-        self.output_format = output_format
+        # 连接池大小与下载线程数匹配，另外预留给列表轮询和HEAD探测
+        self.session = build_session(pool_size=max(download_workers, 1) + 2,
+                                     connect_timeout=connect_timeout,
+                                     read_timeout=read_timeout, http2=http2)
+        self.download_dir = download_dir or os.path.join(os.getcwd(), "downloads")
+        # 输出格式可以是多个，例如 "MHT,HTML,TEXT"，一次下载生成全部输出
+        self.output_formats = parse_formats(output_format)
+        # CPU密集的转换阶段可放入进程池执行，0表示在当前线程执行
+        self.transform_workers = transform_workers
+        self.transform_pool = None
+        # 停止信号，批量模式下所有课程共享，用于结束监视模式和排队的下载
+        self.stop_event = stop_event or threading.Event()
+        # 多于1个下载线程时，先收集全部文件再由调度器按优先级和大小统一下载
+        self.scheduler = None
+        if download_workers > 1:
+            self.scheduler = DownloadScheduler(self.download_file, workers=download_workers,
+                                               session=self.session, probe_sizes=probe_sizes,
+                                               slots=download_slots, stop_event=self.stop_event)
+        # 账号密码（批量模式下自动登录使用）
+        self.username = username
+        self.password = password
+        # 非交互模式下不等待任何键盘输入
+        self.interactive = interactive
+        # 全局并发下载名额，多个课程共享同一个信号量
+        self.download_slots = download_slots
+        # 分片 (k, n)，只处理属于本分片的题目
+        self.shard = shard
+        # 快速浏览器配置：登录后无头运行、eager加载、屏蔽静态资源、显式等待
+        self.fast = fast
+        self.headless = False
+        self.lightweight = False
+        # 监视模式的轮询间隔（秒），None表示只运行一次
+        self.watch_interval = watch_interval
+        # 清单记录本次写出的题目和文件，供分片合并使用
+        self.manifest = {
+            'base_url': base_url,
+            'shard': f"{shard[0]}/{shard[1]}" if shard else None,
+            'questions': {},
+            # 以相对路径为键，写出清单时再转换为列表
+            'files': {},
+        }
+        # 运行统计，用于生成汇总报告
+        self.stats = {
+            'base_url': base_url,
+            'download_dir': self.download_dir,
+            'questions': 0,
+            'files_ok': 0,
+            'files_failed': 0,
+            'elapsed': 0.0,
+            'error': None,
+        }
+        self._stats_lock = threading.Lock()
         
         # 创建下载目录
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
     
-    def setup_driver(self):
+    def setup_driver(self, headless=False, lightweight=False):
         """设置Chrome浏览器驱动"""
         options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        if lightweight:
+            # DOMContentLoaded后即返回，不等待图片等资源的load事件
+            options.page_load_strategy = "eager"
         # 设置下载目录
         prefs = {
             "download.default_directory": self.download_dir,
@@ -40,9 +126,54 @@ class DesunScraper:
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True
         }
+        if lightweight:
+            prefs["profile.managed_default_content_settings.images"] = 2
         options.add_experimental_option("prefs", prefs)
         self.driver = webdriver.Chrome(options)
-        self.driver.implicitly_wait(10)
+        self.headless = headless
+        self.lightweight = lightweight
+        
+        if lightweight:
+            # 快速模式只使用显式等待，并在网络层屏蔽无用资源
+            self.driver.implicitly_wait(0)
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        else:
+            self.driver.implicitly_wait(10)
+    
+    def apply_cookies(self, cookies):
+        """通过CDP把登录cookies写入当前浏览器，无需先打开页面"""
+        params = []
+        for cookie in cookies:
+            item = {
+                'name': cookie['name'],
+                'value': cookie['value'],
+                'path': cookie.get('path', '/'),
+                'secure': cookie.get('secure', False),
+                'httpOnly': cookie.get('httpOnly', False),
+            }
+            if cookie.get('domain'):
+                item['domain'] = cookie['domain']
+            else:
+                item['url'] = self.base_url
+            if 'expiry' in cookie:
+                item['expires'] = cookie['expiry']
+            params.append(item)
+        self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+    
+    def switch_to_headless(self):
+        """登录完成后关闭可见浏览器，换成携带相同cookies的无头浏览器"""
+        cookies = self.driver.get_cookies()
+        self.driver.quit()
+        self.setup_driver(headless=True, lightweight=True)
+        self.apply_cookies(cookies)
+        print("已切换到无头快速浏览器")
+    
+    def wait_for(self, selector, timeout=10):
+        """显式等待指定选择器出现"""
+        return WebDriverWait(self.driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+        )
     
     def manual_login(self):
         """手动登录流程"""
@@ -59,10 +190,89 @@ class DesunScraper:
         # 等待用户手动登录
         input("按回车键继续（确认已登录成功）...")
         
-        # 获取登录后的cookies用于requests会话
-        cookies = self.driver.get_cookies()
-        for cookie in cookies:
-            self.session.cookies.set(cookie['name'], cookie['value'])
+        self.sync_cookies()
+    
+    def auto_login(self):
+        """使用账号密码自动登录，无需人工操作"""
+        print(f"正在自动登录: {self.base_url}")
+        self.driver.get(f"{self.base_url}/Default.aspx")
+        
+        WebDriverWait(self.driver, 10).until(
+            EC.presence_of_element_located((By.ID, "Signin1_username"))
+        )
+        username_input = self.driver.find_element(By.ID, "Signin1_username")
+        password_input = self.driver.find_element(By.ID, "Signin1_password")
+        username_input.clear()
+        username_input.send_keys(self.username)
+        password_input.clear()
+        password_input.send_keys(self.password)
+        self.driver.find_element(By.ID, "Signin1_ButtonLogin").click()
+        
+        # 登录成功后页面会离开Default.aspx
+        try:
+            WebDriverWait(self.driver, 15).until(
+                lambda d: "Default.aspx" not in d.current_url
+            )
+        except TimeoutException:
+            raise RuntimeError(f"自动登录失败，请检查账号密码: {self.base_url}")
+        
+        self.sync_cookies()
+    
+    def login(self):
+        """根据配置选择自动登录或手动登录"""
+        if self.username and self.password:
+            self.auto_login()
+        elif self.interactive:
+            self.manual_login()
+        else:
+            raise RuntimeError("非交互模式需要提供账号和密码")
+    
+    def sync_cookies(self):
+        """获取登录后的cookies用于requests会话，保留domain和path"""
+        copy_driver_cookies(self.session, self.driver.get_cookies())
+    
+    def _write_output(self, path, content):
+        """写出文件并登记到清单"""
+        with open(path, 'wb') as f:
+            f.write(content)
+        
+        entry = {
+            'path': os.path.relpath(path, self.download_dir).replace(os.sep, '/'),
+            'size': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }
+        with self._stats_lock:
+            # 同一路径重复写出时（例如监视模式下题目变更）只保留最新记录
+            self.manifest['files'][entry['path']] = entry
+    
+    def write_manifest(self):
+        """将清单写入输出根目录"""
+        with self._stats_lock:
+            manifest = {**self.manifest,
+                        'questions': dict(self.manifest['questions']),
+                        'files': list(self.manifest['files'].values())}
+        manifest_path = os.path.join(self.download_dir, MANIFEST_NAME)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest_path
+    
+    def print_transport_metrics(self):
+        """输出连接复用率和首字节时间"""
+        metrics = self.stats.get('transport')
+        if not metrics or not metrics['requests']:
+            return
+        reuse = f"{metrics['reuse_rate'] * 100:.1f}%" if metrics['reuse_rate'] is not None else "未知"
+        print(f"网络统计({metrics['http_version']}): 请求 {metrics['requests']} 次，"
+              f"连接复用率 {reuse}，首字节时间 平均 {metrics['ttfb_ms_mean']}ms / "
+              f"P95 {metrics['ttfb_ms_p95']}ms")
+    
+    def _record(self, ok):
+        """记录单个文件的下载结果"""
+        with self._stats_lock:
+            if ok:
+                self.stats['files_ok'] += 1
+            else:
+                self.stats['files_failed'] += 1
     
     def navigate_to_question_list(self):
         """导航到题目列表页面"""
@@ -71,9 +281,7 @@ class DesunScraper:
         self.driver.get(f"{self.base_url}/Main.aspx?tabindex=1&tabid=6")
         
         # 等待页面加载完成
-        WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "table tr"))
-        )
+        self.wait_for("table tr")
     
     def parse_question_list(self):
         """解析题目列表"""
@@ -114,81 +322,103 @@ class DesunScraper:
         
         return questions
     
-    def download_file(self, url, filename):
+    def queue_download(self, url, filename, kind):
+        """提交下载任务：有调度器时排队，否则立即下载；返回DownloadJob，执行后job.ok为结果"""
+        if self.scheduler:
+            return self.scheduler.submit(url, filename, kind)
+        job = DownloadJob(url, filename, kind)
+        job.ok = self.download_file(url, filename)
+        return job
+    
+    def filter_questions(self, questions):
+        """分片模式下只保留属于本分片的题目"""
+        if not self.shard:
+            return questions
+        total = len(questions)
+        questions = [q for q in questions if in_shard(q['id'], self.shard)]
+        print(f"分片 {self.manifest['shard']}: 处理 {len(questions)}/{total} 个题目")
+        return questions
+    
+    def download_file(self, url, filename, progress=None):
+        """下载文件并记录结果"""
+        ok = self._download_file(url, filename, progress)
+        self._record(ok)
+        return ok
+    
+    def _download_file(self, url, filename, progress=None):
         """下载文件到内存并根据需要进行转换"""
         try:
-            response = self.session.get(url, stream=True)
-            response.raise_for_status()
-            
-            # 将文件内容保存在内存中
-            file_content = bytearray()
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    file_content.extend(chunk)
+            # 占用一个全局下载名额，未配置时不限制
+            slot = self.download_slots or contextlib.nullcontext()
+            with slot:
+                response = self.session.get(url, stream=True)
+                response.raise_for_status()
+                
+                # 将文件内容保存在内存中
+                file_content = bytearray()
+                transferred = 0
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        file_content.extend(chunk)
+                        if progress:
+                            # 按线路上传输的字节数（解压前）计数，与HEAD返回的Content-Length一致
+                            position = response.raw.tell() if hasattr(response.raw, 'tell') else len(file_content)
+                            progress(position - transferred)
+                            transferred = position
             
             print(f"下载成功: {filename}")
-            
-            # 检查是否是MHT文件
-            is_mht_file = filename.lower().endswith(('.mht', '.mhtml'))
-            
-            # 根据选择的输出格式处理文件
-            if is_mht_file:
-                if self.output_format == "MHT":
-                    # MHT格式：直接保存
-                    with open(filename, 'wb') as f:
-                        f.write(file_content)
-                    return True
-                elif self.output_format == "HTML":
-                    # HTML格式：转换为HTML
-                    html_filename = self.convert_mht_to_html(file_content, filename)
-                    return html_filename is not None
-                elif self.output_format == "DOC":
-                    # DOC格式：修改文件扩展名为.doc
-                    doc_filename = os.path.splitext(filename)[0] + '.doc'
-                    with open(doc_filename, 'wb') as f:
-                        f.write(file_content)
-                    return True
-            else:
-                # 对于非MHT文件，直接保存
-                with open(filename, 'wb') as f:
-                    f.write(file_content)
-                return True
+            return self.write_outputs(bytes(file_content), filename)
                 
         except Exception as e:
             print(f"下载失败 {url}: {e}")
             return False
     
+    def write_outputs(self, content, filename):
+        """将下载内容送入转换流水线，写出所有选定格式的文件"""
+        ok = True
+        for name, path, result in run_pipeline(content, filename, self.output_formats,
+                                               pool=self.transform_pool):
+            if isinstance(result, Exception):
+                print(f"{name}转换失败 {filename}: {result}")
+                ok = False
+                continue
+            self._write_output(path, result)
+            if path != filename:
+                print(f"生成{name}: {path}")
+        return ok
+    
     def extract_filename_from_url(self, url):
         """从URL中提取文件名"""
         parsed = urlparse(url)
         return os.path.basename(parsed.path)
     
-    def convert_mht_to_html(self, mht_content, original_filename):
-        """将MHT内容转换为HTML文件"""
-        try:
-            # 调用转换函数直接处理内存中的MHT内容
-            html_content = mht_to_html(mht_content)
-            
-            if html_content:
-                # 生成新的HTML文件路径
-                html_file_path = os.path.splitext(original_filename)[0] + '.html'
-                
-                # 直接将HTML内容写入文件
-                with open(html_file_path, 'wb') as f:
-                    f.write(html_content)
-                
-                print(f"MHT转HTML成功: {html_file_path}")
-                return html_file_path
-            else:
-                print(f"MHT转HTML失败: {original_filename}")
-                return None
-                
-        except Exception as e:
-            print(f"MHT文件转换出错 {original_filename}: {e}")
-            return None
+    def wait_for_question_page(self):
+        """等待题目详情页的文件列表就绪"""
+        if self.lightweight:
+            # eager模式下DOM已就绪即返回；没有文件的题目不渲染列表，短暂等待后按空列表处理
+            try:
+                self.wait_for("#DataListFiles, #DatalistAnswers", timeout=2)
+            except TimeoutException:
+                pass
+        else:
+            time.sleep(1)  # 等待页面加载
+
+    def collect_question_links(self):
+        """从当前题目详情页提取参考文件和参考答案的链接"""
+        reference_urls = [a.get_attribute("href")
+                          for a in self.driver.find_elements(By.CSS_SELECTOR, "#DataListFiles a")]
+        answer_urls = [a.get_attribute("href")
+                       for a in self.driver.find_elements(By.CSS_SELECTOR, "#DatalistAnswers a")]
+        return reference_urls, answer_urls
+
+    def load_question_page(self, answer_url):
+        """打开题目详情页，返回参考文件和参考答案的链接"""
+        self.driver.get(answer_url)
+        self.wait_for_question_page()
+        return self.collect_question_links()
     
     def process_question(self, question):
-        """处理单个题目"""
+        """处理单个题目，返回下载任务列表；详情页出错时返回None"""
         question_id = question['id']
         question_name = question['name']
         
@@ -201,48 +431,66 @@ class DesunScraper:
         if not os.path.exists(question_folder):
             os.makedirs(question_folder)
         
+        with self._stats_lock:
+            self.manifest['questions'][question_id] = {'name': question_name, 'folder': folder_name}
+        
         print(f"\n处理题目: {folder_name}")
+        jobs = []
         
         # 下载要求和说明文件
         if question['requirement_url']:
             req_filename = self.extract_filename_from_url(question['requirement_url'])
             req_path = os.path.join(question_folder, req_filename)
-            self.download_file(question['requirement_url'], req_path)
+            jobs.append(self.queue_download(question['requirement_url'], req_path, 'requirement'))
         
         # 导航到题目详情页面获取参考文件和参考答案
         try:
-            self.driver.get(question['answer_url'])
-            time.sleep(1)  # 等待页面加载
+            reference_urls, answer_urls = self.load_question_page(question['answer_url'])
             
             # 下载参考文件
-            reference_files = self.driver.find_elements(By.CSS_SELECTOR, "#DataListFiles a")
-            for i, ref_file in enumerate(reference_files):
-                ref_url = ref_file.get_attribute("href")
+            for i, ref_url in enumerate(reference_urls):
                 if ref_url:
                     ref_filename = self.extract_filename_from_url(ref_url)
                     ref_path = os.path.join(question_folder, f"参考文件_{i+1}_{ref_filename}")
-                    self.download_file(ref_url, ref_path)
+                    jobs.append(self.queue_download(ref_url, ref_path, 'reference'))
             
             # 下载参考答案
-            answer_files = self.driver.find_elements(By.CSS_SELECTOR, "#DatalistAnswers a")
-            for i, ans_file in enumerate(answer_files):
-                ans_url = ans_file.get_attribute("href")
+            for i, ans_url in enumerate(answer_urls):
                 if ans_url:
                     ans_filename = self.extract_filename_from_url(ans_url)
                     ans_path = os.path.join(question_folder, f"参考答案_{i+1}_{ans_filename}")
-                    self.download_file(ans_url, ans_path)
+                    jobs.append(self.queue_download(ans_url, ans_path, 'answer'))
                     
         except Exception as e:
             print(f"处理题目详情时出错: {e}")
+            return None
+        
+        return jobs
     
     def run(self):
-        """运行主程序"""
+        """运行主程序，返回运行统计"""
+        started = time.time()
         try:
             print("启动世格外贸单证教学系统题目下载器")
-            self.setup_driver()
+            if self.transform_workers:
+                # 在启动浏览器和下载线程之前创建进程池；使用spawn避免fork已有线程的进程导致死锁
+                self.transform_pool = ProcessPoolExecutor(
+                    max_workers=self.transform_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            # 快速模式且有账号密码时，从一开始就无头运行
+            auto = bool(self.username and self.password)
+            self.setup_driver(headless=self.fast and auto, lightweight=self.fast and auto)
             
-            # 手动登录
-            self.manual_login()
+            # 登录
+            self.login()
+            if self.fast and not self.headless:
+                self.switch_to_headless()
+            
+            if self.watch_interval:
+                # 监视模式：只轮询题目列表，处理新增或变更的题目
+                ListingWatcher(self, self.watch_interval, stop_event=self.stop_event).run()
+                return self.stats
             
             # 导航到题目列表
             self.navigate_to_question_list()
@@ -250,28 +498,54 @@ class DesunScraper:
             # 解析题目列表
             questions = self.parse_question_list()
             
+            # 分片模式下只保留属于本分片的题目
+            questions = self.filter_questions(questions)
+            
+            self.stats['questions'] = len(questions)
             if not questions:
                 print("未找到任何题目")
-                return
+                return self.stats
             
             print(f"\n找到 {len(questions)} 个题目，开始下载...")
             
             # 处理每个题目
             for i, question in enumerate(questions, 1):
+                if self.stop_event.is_set():
+                    print("收到停止信号，不再处理剩余题目")
+                    break
                 print(f"\n进度: {i}/{len(questions)}")
                 self.process_question(question)
                 
                 # 添加延迟避免请求过快
                 time.sleep(1)
             
+            # 调度器模式下统一执行排队的下载；收到停止信号后不再开始
+            if self.scheduler and not self.stop_event.is_set():
+                print(f"\n开始下载 {len(self.scheduler.jobs)} 个文件...")
+                self.scheduler.run()
+            
             print(f"\n所有题目处理完成！文件保存在: {self.download_dir}")
             
         except Exception as e:
             print(f"程序运行出错: {e}")
+            self.stats['error'] = str(e)
         finally:
+            # 无论是否出错（包括空分片）都写出清单，合并时才能找到每个分片
+            try:
+                print(f"清单文件: {self.write_manifest()}")
+            except Exception as e:
+                print(f"写入清单失败: {e}")
+            self.stats['elapsed'] = round(time.time() - started, 2)
+            self.stats['transport'] = transport_metrics(self.session)
+            self.print_transport_metrics()
+            if self.transform_pool:
+                self.transform_pool.shutdown()
+                self.transform_pool = None
             if self.driver:
-                input("按回车键关闭浏览器...")
+                if self.interactive and not self.headless:
+                    input("按回车键关闭浏览器...")
                 self.driver.quit()
+        return self.stats
 
 
 def get_base_url_from_user():
@@ -323,22 +597,227 @@ def get_output_format_from_user():
         print("   ⚠️  警告: 选择HTML格式可能导致潜在的数据丢失")
         print("2. MHT - 单文件网页格式")
         print("3. DOC - Word文档格式")
+        print("4. TEXT - 纯文本提取")
+        print("可用逗号同时选择多个格式，例如 2,1,4")
         print("=" * 50)
         
-        choice = input("请输入选择 (1-3): ").strip()
+        choice = input("请输入选择 (1-4): ").strip()
+        
+        choices = {"1": "HTML", "2": "MHT", "3": "DOC", "4": "TEXT"}
+        selected = [c.strip() for c in choice.split(',') if c.strip()]
         
-        if choice == "1":
-            return "HTML"
-        elif choice == "2":
-            return "MHT"
-        elif choice == "3":
-            return "DOC"
+        if selected and all(c in choices for c in selected):
+            return ",".join(choices[c] for c in selected)
         else:
-            print("错误: 请输入1-3之间的数字选择格式。\n")
+            print("错误: 请输入1-4之间的数字选择格式。\n")
 
 
-def main():
+def course_name(course):
+    """课程名称：未配置时由URL的主机和路径生成，同一主机上的不同实例不会重名"""
+    name = course.get('name')
+    if not name:
+        parsed = urlparse(course['base_url'])
+        name = parsed.netloc + parsed.path.rstrip('/')
+    return re.sub(r'[<>:"/\\|?*]', '_', name)
+
+
+def course_download_dir(course, output_root, shard=None):
+    """课程的输出目录；output_root已包含分片目录，单独指定的output_dir需要另加分片后缀"""
+    if course.get('output_dir'):
+        download_dir = course['output_dir']
+        if shard:
+            download_dir = os.path.join(download_dir, shard_dir_name(shard))
+        return download_dir
+    return os.path.join(output_root, course_name(course))
+
+
+def load_batch_config(config_path, output_root=None):
+    """读取批量模式配置文件（JSON）"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    
+    if output_root:
+        config['output_root'] = output_root
+    
+    courses = config.get('courses') or []
+    if not courses:
+        raise ValueError(f"配置文件中没有课程: {config_path}")
+    
+    root = config.get('output_root') or os.path.join(os.getcwd(), "downloads")
+    seen_dirs = {}
+    for course in courses:
+        base_url = course.get('base_url', '')
+        if not base_url.startswith(('http://', 'https://')) or not urlparse(base_url).netloc:
+            raise ValueError(f"课程URL格式不正确: {base_url!r}")
+        if not course.get('username') or not course.get('password'):
+            raise ValueError(f"课程缺少账号或密码: {base_url}")
+        parse_formats(course.get('output_format', config.get('output_format', "MHT")))
+        
+        # 不同课程写入同一目录会互相覆盖文件、清单和快照
+        download_dir = os.path.normcase(os.path.abspath(course_download_dir(course, root)))
+        if download_dir in seen_dirs:
+            raise ValueError(f"课程输出目录重复: {base_url} 与 {seen_dirs[download_dir]} -> {download_dir}")
+        seen_dirs[download_dir] = base_url
+    
+    return config
+
+
+def shard_dir_name(shard):
+    """分片输出目录名，例如 shard-1-of-3"""
+    return f"shard-{shard[0]}-of-{shard[1]}"
+
+
+def run_batch(config, concurrency=None, shard=None):
+    """无交互地同时运行多个课程，并写出汇总报告"""
+    courses = config['courses']
+    output_root = config.get('output_root') or os.path.join(os.getcwd(), "downloads")
+    if shard:
+        # 每个分片节点写入独立的输出根目录
+        output_root = os.path.join(output_root, shard_dir_name(shard))
+    concurrency = concurrency or config.get('concurrency') or 4
+    
+    # 所有课程共享同一个并发下载预算
+    download_slots = threading.BoundedSemaphore(concurrency)
+    # Ctrl+C只会到达主线程，由主线程通过停止信号结束各课程的监视模式
+    stop_event = threading.Event()
+    results = [None] * len(courses)
+    
+    def run_course(index, course):
+        # 每个课程使用独立的会话和输出目录
+        name = course_name(course)
+        download_dir = course_download_dir(course, output_root, shard)
+        try:
+            scraper = DesunScraper(
+                base_url=course['base_url'].rstrip('/'),
+                output_format=course.get('output_format', config.get('output_format', "MHT")),
+                download_dir=download_dir,
+                username=course['username'],
+                password=course['password'],
+                interactive=False,
+                download_slots=download_slots,
+                shard=shard,
+                fast=course.get('fast', config.get('fast', False)),
+                transform_workers=config.get('transform_workers', 0),
+                download_workers=course.get('download_workers', config.get('download_workers', 1)),
+                probe_sizes=config.get('probe_sizes', False),
+                watch_interval=config.get('watch_interval'),
+                http2=config.get('http2', False),
+                connect_timeout=config.get('connect_timeout', 10),
+                read_timeout=config.get('read_timeout', 60),
+                stop_event=stop_event,
+            )
+            stats = scraper.run()
+        except Exception as e:
+            print(f"课程 {name} 启动失败: {e}")
+            stats = {'base_url': course['base_url'], 'download_dir': download_dir,
+                     'questions': 0, 'files_ok': 0, 'files_failed': 0,
+                     'elapsed': 0.0, 'error': str(e)}
+        stats['name'] = name
+        results[index] = stats
+    
+    print(f"批量模式: {len(courses)} 个课程，全局并发下载数 {concurrency}")
+    started = time.time()
+    threads = [
+        threading.Thread(target=run_course, args=(i, course), name=f"course-{i}")
+        for i, course in enumerate(courses)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            # 带超时的join使主线程能及时收到Ctrl+C
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        print("\n收到中断信号，等待各课程结束当前操作...")
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    
+    summary = {
+        'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started)),
+        'elapsed': round(time.time() - started, 2),
+        'concurrency': concurrency,
+        'courses': results,
+        'files_ok': sum(r['files_ok'] for r in results),
+        'files_failed': sum(r['files_failed'] for r in results),
+        'failed_courses': [r['name'] for r in results if r['error']],
+    }
+    
+    summary_path = config.get('summary') or os.path.join(output_root, "summary.json")
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    
+    print(f"\n批量任务完成: 成功 {summary['files_ok']} 个文件，失败 {summary['files_failed']} 个文件")
+    print(f"汇总报告: {summary_path}")
+    return summary
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    def shard_arg(value):
+        # 让分片格式和范围错误的具体原因显示给用户
+        try:
+            return parse_shard(value)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    
+    parser = argparse.ArgumentParser(description="世格外贸单证教学系统题目下载器")
+    parser.add_argument('--config', help="批量模式配置文件（JSON），指定后不再交互提问")
+    parser.add_argument('--concurrency', type=int, help="所有课程共享的最大并发下载数")
+    parser.add_argument('--shard', type=shard_arg, metavar='K/N',
+                        help="只处理第K个分片（共N个，从1开始编号）的题目")
+    parser.add_argument('--output', help="输出根目录，默认为 ./downloads")
+    parser.add_argument('--fast', action='store_true',
+                        help="快速浏览器配置：登录后无头运行，屏蔽图片/字体/样式表")
+    parser.add_argument('--transform-workers', type=int, default=0,
+                        help="格式转换使用的进程数，0表示不使用进程池")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="并发下载线程数，大于1时按优先级和文件大小调度下载")
+    parser.add_argument('--probe-sizes', action='store_true',
+                        help="下载前发送HEAD请求获取文件大小，用于排序和剩余时间估计")
+    parser.add_argument('--watch', type=int, metavar='SECONDS',
+                        help="监视模式：按间隔轮询题目列表，只下载新增或变更的题目")
+    parser.add_argument('--http2', action='store_true',
+                        help="使用HTTP/2下载（需要安装 httpx[http2]）")
+    parser.add_argument('--merge', nargs='+', metavar='SHARD_DIR',
+                        help="合并多个分片的输出目录到 --output 指定的目录")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """主函数"""
+    args = parse_args(argv)
+    
+    if args.merge:
+        # 合并模式：将各分片的清单和文件合并为一棵目录树
+        output_root = args.output or os.path.join(os.getcwd(), "downloads")
+        merge_shards(output_root, args.merge)
+        return 0
+    
+    if args.config:
+        # 批量模式：从配置文件读取所有课程，无需交互
+        config = load_batch_config(args.config, output_root=args.output)
+        if args.fast:
+            config['fast'] = True
+        if args.transform_workers:
+            config['transform_workers'] = args.transform_workers
+        if args.workers > 1:
+            config['download_workers'] = args.workers
+        if args.probe_sizes:
+            config['probe_sizes'] = True
+        if args.watch:
+            config['watch_interval'] = args.watch
+        if args.http2:
+            config['http2'] = True
+        summary = run_batch(config, concurrency=args.concurrency, shard=args.shard)
+        return 1 if summary['failed_courses'] else 0
+    
+    download_dir = args.output or os.path.join(os.getcwd(), "downloads")
+    if args.shard:
+        download_dir = os.path.join(download_dir, shard_dir_name(args.shard))
+    
     # 获取用户配置的base_url
     base_url = get_base_url_from_user()
     
@@ -346,9 +825,14 @@ def main():
     output_format = get_output_format_from_user()
     
     # 创建爬虫实例并传入配置的base_url和输出格式
-    scraper = DesunScraper(base_url=base_url, output_format=output_format)
+    scraper = DesunScraper(base_url=base_url, output_format=output_format,
+                           download_dir=download_dir, shard=args.shard, fast=args.fast,
+                           transform_workers=args.transform_workers,
+                           download_workers=args.workers, probe_sizes=args.probe_sizes,
+                           watch_interval=args.watch, http2=args.http2)
     scraper.run()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
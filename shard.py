@@ -0,0 +1,166 @@
+import os
+import json
+import shutil
+import hashlib
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+def parse_shard(spec: str) -> tuple:
+    """
+    Parse a shard specification of the form "k/n".
+
+    Shards are numbered from 1, so "1/3", "2/3" and "3/3" together
+    cover the whole question bank.
+
+    Args:
+        spec: Shard specification string
+
+    Returns:
+        (k, n) tuple of integers
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    try:
+        k, n = (int(part) for part in spec.split('/'))
+    except (ValueError, AttributeError):
+        raise ValueError(f"Invalid shard specification: {spec!r} (expected k/n)")
+
+    if n < 1 or not 1 <= k <= n:
+        raise ValueError(f"Shard out of range: {spec!r} (expected 1 <= k <= n)")
+
+    return k, n
+
+
+def shard_of(question_id: str, count: int) -> int:
+    """
+    Return the 1-based shard that owns a question id.
+
+    Uses a stable hash so every node assigns the same questions to the
+    same shard regardless of listing order or Python hash seed.
+
+    Args:
+        question_id: Question id as shown in the question list
+        count: Total number of shards
+
+    Returns:
+        Shard number in the range 1..count
+    """
+    digest = hashlib.sha1(question_id.strip().encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def in_shard(question_id: str, shard: tuple) -> bool:
+    """
+    Check whether a question belongs to the given shard.
+
+    Args:
+        question_id: Question id as shown in the question list
+        shard: (k, n) tuple as returned by parse_shard, or None for all
+
+    Returns:
+        True if the question should be processed by this node
+    """
+    if shard is None:
+        return True
+    k, n = shard
+    return shard_of(question_id, n) == k
+
+
+def file_digest(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+
+    Args:
+        path: File path
+
+    Returns:
+        Hex digest string
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(root: str) -> dict:
+    """
+    Load the manifest written by a scraper run.
+
+    Args:
+        root: Output root containing manifest.json
+
+    Returns:
+        Manifest dictionary
+
+    Raises:
+        FileNotFoundError: If the directory has no manifest
+    """
+    with open(os.path.join(root, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def merge_shards(output_root: str, shard_roots: list) -> dict:
+    """
+    Merge several shard output roots into one tree.
+
+    Files listed in each shard manifest are copied into output_root and
+    verified against their recorded digest. A question claimed by more
+    than one shard keeps the first copy seen. Roots without a manifest
+    are reported and skipped.
+
+    Args:
+        output_root: Destination directory
+        shard_roots: Shard output roots, each containing manifest.json
+
+    Returns:
+        The merged manifest, also written to output_root
+    """
+    os.makedirs(output_root, exist_ok=True)
+    merged = {'base_url': None, 'shard': None, 'merged_from': [],
+              'questions': {}, 'files': []}
+    seen_paths = set()
+
+    for root in shard_roots:
+        try:
+            manifest = load_manifest(root)
+        except FileNotFoundError:
+            print(f"分片目录缺少清单，已跳过: {root}")
+            continue
+        merged['base_url'] = merged['base_url'] or manifest.get('base_url')
+        merged['merged_from'].append({'root': os.path.abspath(root),
+                                      'shard': manifest.get('shard')})
+
+        for question_id, info in manifest.get('questions', {}).items():
+            if question_id in merged['questions']:
+                print(f"题目 {question_id} 在多个分片中出现，保留首次出现的版本")
+                continue
+            merged['questions'][question_id] = info
+
+        for entry in manifest.get('files', []):
+            rel_path = entry['path']
+            if rel_path in seen_paths:
+                continue
+
+            src = os.path.join(root, rel_path)
+            if not os.path.exists(src):
+                print(f"分片文件缺失: {src}")
+                continue
+            if entry.get('sha256') and file_digest(src) != entry['sha256']:
+                print(f"分片文件校验失败: {src}")
+                continue
+
+            dst = os.path.join(output_root, rel_path)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy2(src, dst)
+            seen_paths.add(rel_path)
+            merged['files'].append(entry)
+
+    with open(os.path.join(output_root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(merged, f, ensure_ascii=False, indent=2)
+
+    print(f"合并完成: {len(merged['questions'])} 个题目，{len(merged['files'])} 个文件 -> {output_root}")
+    return merged
@@ -0,0 +1,136 @@
+import time
+import threading
+
+from scheduler import DownloadScheduler
+
+
+class FakeResponse:
+    def __init__(self, size):
+        self.ok = size is not None
+        self.headers = {'Content-Length': str(size)} if size is not None else {}
+
+
+class FakeSession:
+    """HEAD-only session that records the peak number of concurrent probes."""
+
+    def __init__(self, sizes):
+        self.sizes = sizes
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def head(self, url, allow_redirects=True):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self._lock:
+            self.active -= 1
+        return FakeResponse(self.sizes.get(url))
+
+
+def make_scheduler(**kwargs):
+    return DownloadScheduler(lambda url, path, progress: True, report_interval=3600, **kwargs)
+
+
+def test_order_by_priority_then_size():
+    scheduler = make_scheduler()
+    sizes = {'ref-big': 900, 'ans-small': 10, 'req-big': 500, 'ans-unknown': None, 'ref-small': 5}
+    kinds = {'ref': 'reference', 'ans': 'answer', 'req': 'requirement'}
+    for name, size in sizes.items():
+        scheduler.submit(name, name, kinds[name.split('-')[0]]).size = size
+
+    # 未知大小按已知大小的中位数 (10, 5, 500, 900 -> 255) 估算
+    assert [job.url for job in scheduler.order()] == \
+        ['req-big', 'ans-unknown', 'ans-small', 'ref-big', 'ref-small']
+
+
+def test_remaining_bytes_unknown_until_a_size_is_known():
+    scheduler = make_scheduler()
+    first = scheduler.submit('a', 'a', 'answer')
+    second = scheduler.submit('b', 'b', 'answer')
+    assert scheduler.remaining_bytes() is None
+    assert scheduler.eta() is None
+
+    first.size = 100
+    first.done = 40
+    # 第二个文件按已知大小的中位数估算
+    assert scheduler.remaining_bytes() == 60 + 100
+    second.size = 30
+    assert scheduler.remaining_bytes() == 60 + 30
+
+
+def test_eta_from_observed_throughput():
+    scheduler = make_scheduler()
+    job = scheduler.submit('a', 'a', 'answer')
+    job.size = 300
+    scheduler._started = time.time() - 10
+    assert scheduler.eta() is None
+
+    job.done = 100
+    assert abs(scheduler.eta() - 20) < 0.5
+
+
+def test_run_downloads_every_job_and_records_results():
+    def download(url, path, progress):
+        progress(len(url))
+        progress(len(url))
+        return url != 'bad'
+
+    scheduler = DownloadScheduler(download, workers=3, report_interval=3600)
+    jobs = [scheduler.submit(url, url, 'answer') for url in ('a', 'bb', 'bad', 'cccc')]
+
+    result = scheduler.run()
+
+    assert result['ok'] == 3 and result['failed'] == 1
+    assert result['bytes'] == 2 * (1 + 2 + 3 + 4)
+    assert [job.ok for job in jobs] == [True, True, False, True]
+    assert [job.size for job in jobs] == [2, 4, 6, 8]
+    assert scheduler.jobs == []
+
+
+def test_probes_respect_shared_download_slots():
+    urls = [f"u{i}" for i in range(8)]
+    session = FakeSession({url: 100 for url in urls[:6]})
+    slots = threading.BoundedSemaphore(2)
+    scheduler = make_scheduler(workers=8, session=session, probe_sizes=True, slots=slots)
+    jobs = [scheduler.submit(url, url, 'answer') for url in urls]
+
+    scheduler.run()
+
+    assert session.peak <= 2
+    assert all(job.ok for job in jobs)
+
+
+def test_probe_reads_content_length():
+    session = FakeSession({'known': 1234})
+    scheduler = make_scheduler(session=session, probe_sizes=True)
+    known = scheduler.submit('known', 'known', 'answer')
+    unknown = scheduler.submit('unknown', 'unknown', 'answer')
+
+    scheduler._probe(known)
+    scheduler._probe(unknown)
+
+    assert known.size == 1234
+    assert unknown.size is None
+
+
+def test_run_stops_taking_jobs_once_stop_event_is_set():
+    stop_event = threading.Event()
+    started = []
+
+    def download(url, path, progress):
+        started.append(url)
+        stop_event.set()
+        return True
+
+    scheduler = DownloadScheduler(download, workers=2, report_interval=3600, stop_event=stop_event)
+    jobs = [scheduler.submit(f"u{i}", f"u{i}", 'answer') for i in range(10)]
+
+    result = scheduler.run()
+
+    # 已开始的文件会下载完成，其余文件保持未运行状态
+    assert 1 <= len(started) <= 2
+    assert result['ok'] == len(started)
+    assert result['skipped'] == 10 - len(started)
+    assert sum(job.ok is None for job in jobs) == result['skipped']
@@ -0,0 +1,73 @@
+import json
+import hashlib
+
+import pytest
+
+from shard import MANIFEST_NAME, parse_shard, shard_of, in_shard, merge_shards
+
+
+def test_parse_shard_valid():
+    assert parse_shard("1/3") == (1, 3)
+    assert parse_shard("3/3") == (3, 3)
+
+
+@pytest.mark.parametrize("spec", ["0/3", "4/3", "1/0", "a/3", "1-3", "1/2/3", ""])
+def test_parse_shard_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_shard(spec)
+
+
+def test_shard_of_is_stable_and_in_range():
+    ids = [f"{i:06d}" for i in range(200)]
+    first = [shard_of(question_id, 4) for question_id in ids]
+    assert first == [shard_of(question_id, 4) for question_id in ids]
+    assert set(first) == {1, 2, 3, 4}
+    # 首尾空白不影响分片
+    assert shard_of(" 010101 ", 4) == shard_of("010101", 4)
+
+
+def test_shards_partition_the_bank():
+    ids = [f"{i:06d}" for i in range(100)]
+    owners = [[k for k in range(1, 4) if in_shard(question_id, (k, 3))] for question_id in ids]
+    assert all(len(owner) == 1 for owner in owners)
+    assert all(in_shard(question_id, None) for question_id in ids)
+
+
+def write_shard(root, question_id, content, corrupt=False):
+    folder = root / question_id
+    folder.mkdir(parents=True)
+    (folder / "a.mht").write_bytes(b"corrupted" if corrupt else content)
+    manifest = {
+        'base_url': "http://host/doc",
+        'shard': None,
+        'questions': {question_id: {'name': question_id, 'folder': question_id}},
+        'files': [{'path': f"{question_id}/a.mht", 'size': len(content),
+                   'sha256': hashlib.sha256(content).hexdigest()}],
+    }
+    (root / MANIFEST_NAME).write_text(json.dumps(manifest), encoding='utf-8')
+
+
+def test_merge_shards_copies_verified_files(tmp_path):
+    write_shard(tmp_path / "s1", "q1", b"one")
+    write_shard(tmp_path / "s2", "q2", b"two")
+    write_shard(tmp_path / "s3", "q3", b"three", corrupt=True)
+    (tmp_path / "empty").mkdir()
+
+    merged = merge_shards(str(tmp_path / "out"),
+                          [str(tmp_path / name) for name in ("s1", "s2", "s3", "empty")])
+
+    assert sorted(merged['questions']) == ["q1", "q2", "q3"]
+    assert [entry['path'] for entry in merged['files']] == ["q1/a.mht", "q2/a.mht"]
+    assert (tmp_path / "out" / "q2" / "a.mht").read_bytes() == b"two"
+    assert not (tmp_path / "out" / "q3").exists()
+    assert json.loads((tmp_path / "out" / MANIFEST_NAME).read_text(encoding='utf-8')) == merged
+
+
+def test_course_download_dir_keeps_shard_suffix():
+    scraper = pytest.importorskip("scraper")
+    course = {'base_url': "http://host/doc1", 'output_dir': "/data/course"}
+    assert scraper.course_download_dir(course, "/root/shard-2-of-3", (2, 3)) == \
+        scraper.os.path.join("/data/course", "shard-2-of-3")
+    course = {'base_url': "http://host/doc1"}
+    assert scraper.course_download_dir(course, "/root/shard-2-of-3", (2, 3)) == \
+        scraper.os.path.join("/root/shard-2-of-3", "host_doc1")
@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import transforms
+from transforms import available_formats, parse_formats, run_pipeline
+
+
+MHT = (b'MIME-Version: 1.0\r\n'
+       b'Content-Type: multipart/related; boundary="b"\r\n\r\n'
+       b'--b\r\n'
+       b'Content-Type: text/html; charset=utf-8\r\n\r\n'
+       b'<html><body><p>Hello</p><p>World</p></body></html>\r\n'
+       b'--b--\r\n')
+
+
+def test_parse_formats_normalises_and_dedupes():
+    assert parse_formats("mht, html,MHT") == ["MHT", "HTML"]
+    assert parse_formats(["text", "Html"]) == ["TEXT", "HTML"]
+    assert set(available_formats()) >= {"MHT", "DOC", "HTML", "TEXT"}
+
+
+@pytest.mark.parametrize("value", ["", " , ", "PDF", "MHT,PDF"])
+def test_parse_formats_rejects_unknown_or_empty(value):
+    with pytest.raises(ValueError):
+        parse_formats(value)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_run_pipeline_produces_every_output(workers):
+    formats = ["MHT", "DOC", "HTML", "TEXT"]
+    if workers:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outputs = run_pipeline(MHT, "q/a.mht", formats, pool=pool)
+    else:
+        outputs = run_pipeline(MHT, "q/a.mht", formats)
+
+    assert [(name, path) for name, path, _ in outputs] == [
+        ("MHT", "q/a.mht"), ("DOC", "q/a.doc"), ("HTML", "q/a.html"), ("TEXT", "q/a.txt")]
+    results = {name: result for name, _, result in outputs}
+    assert results["MHT"] == results["DOC"] == MHT
+    assert b"<p>Hello</p>" in results["HTML"]
+    assert results["TEXT"] == b"Hello\nWorld\n"
+
+
+def test_run_pipeline_converts_shared_source_once(monkeypatch):
+    html_stage = transforms._REGISTRY['mht']['HTML']
+    calls = []
+
+    def counting(content, convert=html_stage.func):
+        calls.append(content)
+        return convert(content)
+
+    monkeypatch.setattr(html_stage, 'func', counting)
+    outputs = run_pipeline(MHT, "q/a.mht", ["TEXT", "HTML"])
+
+    assert len(calls) == 1
+    assert [name for name, _, _ in outputs] == ["TEXT", "HTML"]
+
+
+def test_run_pipeline_propagates_source_failure():
+    outputs = run_pipeline(b"not an mht file", "q/a.mht", ["MHT", "HTML", "TEXT"])
+    results = {name: result for name, _, result in outputs}
+
+    assert results["MHT"] == b"not an mht file"
+    assert isinstance(results["HTML"], ValueError)
+    # 依赖 HTML 的纯文本输出得到同一个异常，而不是空内容
+    assert results["TEXT"] is results["HTML"]
+
+
+def test_run_pipeline_passes_through_other_content_types():
+    assert run_pipeline(b"%PDF", "q/a.pdf", ["HTML", "TEXT"]) == [("RAW", "q/a.pdf", b"%PDF")]
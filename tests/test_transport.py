@@ -0,0 +1,102 @@
+import gzip
+
+import pytest
+import requests
+
+from transport import HTTP2Adapter, build_session, cookie_domain, copy_driver_cookies
+
+
+def driver_cookie(name, domain, **extra):
+    return {'name': name, 'value': name.lower(), 'domain': domain, 'path': '/',
+            'secure': False, 'httpOnly': True, **extra}
+
+
+def cookie_header(session, url):
+    return session.prepare_request(requests.Request('GET', url)).headers.get('Cookie')
+
+
+@pytest.mark.parametrize("domain, expected", [
+    ("localhost", "localhost.local"),
+    (".desun", ".desun.local"),
+    ("school.edu.cn", "school.edu.cn"),
+    (".school.edu.cn", ".school.edu.cn"),
+    ("10.0.0.5", "10.0.0.5"),
+    ("::1", "::1"),
+    ("", ""),
+])
+def test_cookie_domain(domain, expected):
+    assert cookie_domain(domain) == expected
+
+
+@pytest.mark.parametrize("url, domain", [
+    ("http://localhost/doc/Main.aspx", "localhost"),
+    ("http://jxserver:8080/doc/Main.aspx", "jxserver"),
+    ("http://10.0.0.5:8080/doc/Main.aspx", "10.0.0.5"),
+    ("http://127.0.0.1/doc/Main.aspx", "127.0.0.1"),
+    ("https://school.edu.cn/doc/Main.aspx", "school.edu.cn"),
+])
+def test_copied_cookies_are_sent_back(url, domain):
+    session = requests.Session()
+    copy_driver_cookies(session, [driver_cookie("ASPSESSIONID", domain),
+                                  driver_cookie("AUTH", "." + domain)])
+
+    assert cookie_header(session, url) == "ASPSESSIONID=aspsessionid; AUTH=auth"
+
+
+def test_copied_cookies_stay_on_their_host():
+    session = requests.Session()
+    copy_driver_cookies(session, [driver_cookie("A", "localhost"),
+                                  driver_cookie("B", "school.edu.cn", path="/doc")])
+
+    assert cookie_header(session, "http://other.example.com/doc/") is None
+    assert cookie_header(session, "http://school.edu.cn/other/") is None
+    assert cookie_header(session, "http://school.edu.cn/doc/x") == "B=b"
+
+
+@pytest.fixture
+def http2_adapter():
+    httpx = pytest.importorskip("httpx")
+
+    def handler(request):
+        version = b"HTTP/1.1" if request.url.scheme == "http" else b"HTTP/2"
+        body = gzip.compress(b"x" * 4096)
+        # 以流的形式返回，和真实网络一样经过 httpx 的字节计数
+        return httpx.Response(200, stream=httpx.ByteStream(body), extensions={'http_version': version},
+                              headers={'Content-Encoding': 'gzip',
+                                       'Set-Cookie': "ASP.NET_SessionId=new; Path=/"})
+
+    session = build_session(http2=True)
+    adapter = session.get_adapter('https://')
+    adapter.client.close()
+    adapter.client = httpx.Client(transport=httpx.MockTransport(handler))
+    yield session, adapter
+    session.close()
+
+
+def test_http2_adapter_decodes_and_counts_wire_bytes(http2_adapter):
+    session, adapter = http2_adapter
+    assert isinstance(adapter, HTTP2Adapter)
+
+    response = session.get("https://host/doc/a.mht", stream=True)
+
+    assert response.content == b"x" * 4096
+    assert 'Content-Encoding' not in response.headers
+    # 进度按传输字节计算，即压缩后的长度
+    assert response.raw.tell() == len(gzip.compress(b"x" * 4096))
+    assert session.cookies.get("ASP.NET_SessionId") == "new"
+
+
+def test_http2_adapter_reports_negotiated_versions(http2_adapter, capsys):
+    session, adapter = http2_adapter
+
+    session.get("https://host/doc/a")
+    assert adapter.report()['http_version'] == "HTTP/2"
+
+    session.get("http://host/doc/a")
+    session.get("http://host/doc/b")
+    # 明文 http:// 只提示一次
+    assert capsys.readouterr().out.count("HTTP/1.1") == 1
+
+    report = adapter.report()
+    assert report['http_version'] == "HTTP/1.1 x2, HTTP/2 x1"
+    assert report['requests'] == 3
@@ -0,0 +1,215 @@
+import json
+import threading
+
+import pytest
+
+from watch import SNAPSHOT_NAME, ListingWatcher, parse_question_list_html, row_digest
+
+
+BASE_URL = "http://host/doc"
+LIST_URL = f"{BASE_URL}/Main.aspx?tabindex=1&tabid=6"
+
+
+def listing(*rows):
+    """Build a question list page in the layout the site renders."""
+    body = ['<table><tr><td>编号</td><td>名称</td></tr>']
+    for qid, name in rows:
+        body.append(
+            f'<tr style="Color: #000066;"><td> {qid} </td>'
+            f'<td><span id="GridView1_ctl02_LabelA0801">{name}</span></td>'
+            f'<td><a id="GridView1_ctl02_HyperLinkShow" href="Show.aspx?id={qid}">查看</a>'
+            f'<a id="GridView1_ctl02_HyperLinkA0801" href="/doc/Req.aspx?id={qid}">要求</a></td></tr>')
+    body.append('</table>')
+    return ''.join(body)
+
+
+class FakeResponse:
+    def __init__(self, text='', status_code=200, url=LIST_URL, headers=None):
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, headers=None):
+        self.sent_headers.append(headers or {})
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+class FakeJob:
+    def __init__(self, ok):
+        self.ok = ok
+
+
+class FakeScraper:
+    """Stands in for a logged-in DesunScraper without a browser."""
+
+    def __init__(self, download_dir, session, failing=(), shard_ids=None):
+        self.base_url = BASE_URL
+        self.download_dir = str(download_dir)
+        self.session = session
+        self.scheduler = None
+        self.stats = {'questions': 0}
+        self.username = None
+        self.password = None
+        self.failing = set(failing)
+        self.shard_ids = shard_ids
+        self.processed = []
+        self.logins = 0
+
+    def filter_questions(self, questions):
+        if self.shard_ids is None:
+            return questions
+        return [q for q in questions if q['id'] in self.shard_ids]
+
+    def process_question(self, question):
+        self.processed.append(question['id'])
+        return [FakeJob(question['id'] not in self.failing)]
+
+    def write_manifest(self):
+        pass
+
+    def auto_login(self):
+        self.logins += 1
+
+
+def test_parser_extracts_question_rows():
+    html = listing(("001", "A &amp; B"), ("002", "第二题")) + \
+        '<table><tr style="color:#000066"><td>003</td><td>没有链接</td></tr></table>'
+
+    questions = parse_question_list_html(html, LIST_URL)
+
+    assert questions == [
+        {'id': "001", 'name': "A & B", 'answer_url': f"{BASE_URL}/Show.aspx?id=001",
+         'requirement_url': f"{BASE_URL}/Req.aspx?id=001"},
+        {'id': "002", 'name': "第二题", 'answer_url': f"{BASE_URL}/Show.aspx?id=002",
+         'requirement_url': f"{BASE_URL}/Req.aspx?id=002"},
+    ]
+
+
+def test_poll_returns_changes_and_uses_validators(tmp_path):
+    first = FakeResponse(listing(("001", "a"), ("002", "b")),
+                         headers={'ETag': '"v1"', 'Last-Modified': "Mon, 01 Jan 2024 00:00:00 GMT"})
+    session = FakeSession(first, FakeResponse(status_code=304))
+    watcher = ListingWatcher(FakeScraper(tmp_path, session))
+
+    changed = watcher.poll()
+    assert [q['id'] for q in changed] == ["001", "002"]
+    watcher.process(changed)
+
+    assert watcher.poll() == []
+    assert session.sent_headers[-1] == {'If-None-Match': '"v1"',
+                                        'If-Modified-Since': "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+    # 快照写入输出根目录，重启后从上次的位置继续
+    saved = json.loads((tmp_path / SNAPSHOT_NAME).read_text(encoding='utf-8'))
+    assert saved['etag'] == '"v1"'
+    assert ListingWatcher(FakeScraper(tmp_path, session)).snapshot == watcher.snapshot
+
+
+def test_failed_rows_are_retried_on_next_poll(tmp_path):
+    page = FakeResponse(listing(("001", "a"), ("002", "b")), headers={'ETag': '"v1"'})
+    session = FakeSession(page)
+    scraper = FakeScraper(tmp_path, session, failing={"002"})
+    watcher = ListingWatcher(scraper)
+
+    watcher.process(watcher.poll())
+    assert list(watcher.snapshot['rows']) == ["001"]
+    # 有失败的题目时不提交校验信息，下次轮询不带条件请求头并重新比较
+    assert watcher.snapshot['etag'] is None and watcher.snapshot['body'] is None
+
+    scraper.failing.clear()
+    retried = watcher.poll()
+    assert session.sent_headers[-1] == {}
+    assert [q['id'] for q in retried] == ["002"]
+    watcher.process(retried)
+    assert watcher.snapshot['etag'] == '"v1"'
+    assert watcher.poll() == []
+    assert scraper.processed == ["001", "002", "002"]
+
+
+def test_changed_and_removed_rows(tmp_path):
+    session = FakeSession(FakeResponse(listing(("001", "a"), ("002", "b"))),
+                          FakeResponse(listing(("001", "renamed"), ("003", "c"))))
+    watcher = ListingWatcher(FakeScraper(tmp_path, session))
+    watcher.process(watcher.poll())
+
+    changed = watcher.poll()
+
+    assert [q['id'] for q in changed] == ["001", "003"]
+    assert "002" not in watcher.snapshot['rows']
+
+
+def test_empty_page_keeps_snapshot(tmp_path):
+    session = FakeSession(FakeResponse(listing(("001", "a"))),
+                          FakeResponse("<html>系统维护中</html>"),
+                          FakeResponse(listing(("001", "a"))))
+    watcher = ListingWatcher(FakeScraper(tmp_path, session))
+    watcher.process(watcher.poll())
+    rows = dict(watcher.snapshot['rows'])
+
+    assert watcher.poll() == []
+    watcher.process([])
+    assert watcher.snapshot['rows'] == rows
+    # 维护结束后列表恢复原样，不会重新下载
+    assert watcher.poll() == []
+
+
+def test_rows_of_other_shards_are_marked_seen(tmp_path):
+    session = FakeSession(FakeResponse(listing(("001", "a"), ("002", "b"))))
+    scraper = FakeScraper(tmp_path, session, shard_ids={"001"})
+    watcher = ListingWatcher(scraper)
+
+    watcher.process(watcher.poll())
+
+    assert scraper.processed == ["001"]
+    assert watcher.snapshot['rows']["002"] == row_digest(
+        parse_question_list_html(listing(("002", "b")), LIST_URL)[0])
+
+
+def test_expired_session_raises_permission_error(tmp_path):
+    session = FakeSession(FakeResponse("<form></form>", url=f"{BASE_URL}/Default.aspx"))
+    watcher = ListingWatcher(FakeScraper(tmp_path, session))
+
+    with pytest.raises(PermissionError):
+        watcher.poll()
+
+
+def test_run_relogs_in_once_then_gives_up(tmp_path):
+    session = FakeSession(FakeResponse("<form></form>", url=f"{BASE_URL}/Default.aspx"))
+    scraper = FakeScraper(tmp_path, session)
+    scraper.username, scraper.password = "user", "secret"
+
+    ListingWatcher(scraper, interval=0).run()
+
+    assert scraper.logins == 1
+    assert len(session.sent_headers) == 2
+
+
+def test_run_returns_once_stop_event_is_set(tmp_path):
+    stop_event = threading.Event()
+    session = FakeSession(FakeResponse(listing(("001", "a"))))
+    scraper = FakeScraper(tmp_path, session)
+    original = scraper.process_question
+
+    def process_and_stop(question):
+        stop_event.set()
+        return original(question)
+
+    scraper.process_question = process_and_stop
+    thread = threading.Thread(target=ListingWatcher(scraper, interval=3600, stop_event=stop_event).run)
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert scraper.processed == ["001"]
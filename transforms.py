@@ -0,0 +1,195 @@
+import os
+from mht2html import mht_to_html, html_to_text
+
+
+class Transform:
+    """
+    A single output stage of the transform pipeline.
+
+    Attributes:
+        name: Output format name, e.g. "HTML"
+        suffix: File extension of the output, or None to keep the original name
+        func: bytes -> bytes conversion, or None to pass the source through
+        source: Name of the stage whose result feeds this one, or None for the raw download
+        cpu_bound: Whether the stage may be offloaded to a worker pool
+    """
+
+    def __init__(self, name, suffix=None, func=None, source=None, cpu_bound=False):
+        self.name = name
+        self.suffix = suffix
+        self.func = func
+        self.source = source
+        self.cpu_bound = cpu_bound
+
+    def output_path(self, filename: str) -> str:
+        """
+        Derive the output file path from the downloaded file name.
+
+        Args:
+            filename: Path the download would be saved under
+
+        Returns:
+            Path for this stage's output
+        """
+        if self.suffix is None:
+            return filename
+        return os.path.splitext(filename)[0] + self.suffix
+
+
+# content type -> {format name: Transform}
+_REGISTRY = {}
+
+
+def register_transform(content_type: str, name: str, suffix: str = None,
+                       func=None, source: str = None, cpu_bound: bool = False) -> Transform:
+    """
+    Register an output stage for a content type.
+
+    Functions run in a worker pool must be picklable, i.e. defined at
+    module level.
+
+    Args:
+        content_type: Content type as returned by content_type_of
+        name: Output format name
+        suffix: File extension of the output, or None to keep the original name
+        func: bytes -> bytes conversion, or None to pass the source through
+        source: Name of the stage to read from, or None for the raw download
+        cpu_bound: Whether the stage may be offloaded to a worker pool
+
+    Returns:
+        The registered Transform
+    """
+    transform = Transform(name.upper(), suffix, func, source and source.upper(), cpu_bound)
+    _REGISTRY.setdefault(content_type, {})[transform.name] = transform
+    return transform
+
+
+def content_type_of(filename: str) -> str:
+    """
+    Classify a downloaded file by its name.
+
+    Args:
+        filename: Downloaded file name
+
+    Returns:
+        "mht" for MHT/MHTML files, "binary" for everything else
+    """
+    if filename.lower().endswith(('.mht', '.mhtml')):
+        return 'mht'
+    return 'binary'
+
+
+def available_formats() -> list:
+    """
+    List every registered output format name.
+
+    Returns:
+        Sorted list of format names
+    """
+    return sorted({name for stages in _REGISTRY.values() for name in stages})
+
+
+def parse_formats(value) -> list:
+    """
+    Normalise an output format selection.
+
+    Args:
+        value: Comma separated string such as "MHT,HTML" or a list of names
+
+    Returns:
+        List of upper-case format names without duplicates
+
+    Raises:
+        ValueError: If a format is unknown or the selection is empty
+    """
+    if isinstance(value, str):
+        value = value.split(',')
+
+    formats = []
+    for name in value:
+        name = name.strip().upper()
+        if not name or name in formats:
+            continue
+        if name not in available_formats():
+            raise ValueError(f"Unknown output format: {name}")
+        formats.append(name)
+
+    if not formats:
+        raise ValueError("No output format selected")
+    return formats
+
+
+def run_pipeline(content: bytes, filename: str, formats: list, pool=None) -> list:
+    """
+    Produce every requested output from one downloaded byte stream.
+
+    Each stage reads its source from memory, so shared intermediates
+    (e.g. the HTML that the text extract is built from) are computed once
+    even when they are not written out themselves. CPU-bound stages are
+    submitted to pool when one is given. Content types without any of the
+    requested stages are passed through unchanged.
+
+    Args:
+        content: Downloaded bytes
+        filename: Path the download would be saved under
+        formats: Output format names as returned by parse_formats
+        pool: Optional concurrent.futures executor for CPU-bound stages
+
+    Returns:
+        List of (format name, output path, bytes or exception) tuples
+    """
+    stages = _REGISTRY.get(content_type_of(filename), {})
+    wanted = [name for name in formats if name in stages]
+    if not wanted:
+        return [('RAW', filename, content)]
+
+    results = {}
+
+    def resolve(name):
+        if name in results:
+            return results[name]
+
+        transform = stages[name]
+        if transform.source is None:
+            source = content
+        else:
+            source = resolve(transform.source)
+            if hasattr(source, 'result'):
+                source = source.result()
+            if isinstance(source, Exception):
+                raise source
+
+        if transform.func is None:
+            result = source
+        elif pool is not None and transform.cpu_bound:
+            result = pool.submit(transform.func, source)
+        else:
+            result = transform.func(source)
+
+        results[name] = result
+        return result
+
+    outputs = []
+    # Submit every stage first so independent CPU work overlaps in the pool
+    for name in wanted:
+        try:
+            resolve(name)
+        except Exception as e:
+            results[name] = e
+
+    for name in wanted:
+        result = results[name]
+        try:
+            if hasattr(result, 'result'):
+                result = result.result()
+        except Exception as e:
+            result = e
+        outputs.append((name, stages[name].output_path(filename), result))
+
+    return outputs
+
+
+register_transform('mht', 'MHT')
+register_transform('mht', 'DOC', suffix='.doc')
+register_transform('mht', 'HTML', suffix='.html', func=mht_to_html, cpu_bound=True)
+register_transform('mht', 'TEXT', suffix='.txt', func=html_to_text, source='HTML', cpu_bound=True)
@@ -0,0 +1,367 @@
+import time
+import threading
+import statistics
+from collections import Counter
+import requests
+from requests.adapters import HTTPAdapter, BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+try:
+    import brotli  # noqa: F401  urllib3 decodes "br" when brotli is installed
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class TransportMetrics:
+    """
+    Thread-safe time-to-first-byte samples for one adapter.
+
+    Attributes:
+        requests: Number of requests sent
+        ttfb: Seconds from sending the request to receiving response headers
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.ttfb = []
+
+    def record(self, ttfb: float):
+        """
+        Record one completed request.
+
+        Args:
+            ttfb: Time to first byte in seconds
+        """
+        with self._lock:
+            self.requests += 1
+            self.ttfb.append(ttfb)
+
+    def summary(self) -> dict:
+        """
+        Summarise the recorded samples.
+
+        Returns:
+            Dictionary with request count and TTFB mean/median/p95 in milliseconds
+        """
+        with self._lock:
+            samples = sorted(self.ttfb)
+            count = self.requests
+        if not samples:
+            return {'requests': count, 'ttfb_ms_mean': None, 'ttfb_ms_p50': None, 'ttfb_ms_p95': None}
+        return {
+            'requests': count,
+            'ttfb_ms_mean': round(statistics.mean(samples) * 1000, 1),
+            'ttfb_ms_p50': round(statistics.median(samples) * 1000, 1),
+            'ttfb_ms_p95': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1),
+        }
+
+
+class TunedHTTPAdapter(HTTPAdapter):
+    """
+    HTTP/1.1 adapter with a default timeout and connection-pool metrics.
+
+    urllib3 returns from urlopen once the response headers have been read
+    (the body is streamed later), so the time spent in send() is the time
+    to first byte.
+    """
+
+    def __init__(self, timeout=None, **kwargs):
+        """
+        Args:
+            timeout: Default (connect, read) timeout for requests without one
+            **kwargs: Passed to HTTPAdapter (pool_connections, pool_maxsize, max_retries)
+        """
+        self.timeout = timeout
+        self.metrics = TransportMetrics()
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        started = time.perf_counter()
+        response = super().send(request, **kwargs)
+        self.metrics.record(time.perf_counter() - started)
+        return response
+
+    def report(self) -> dict:
+        """
+        Report TTFB and connection reuse across all host pools.
+
+        Returns:
+            Metrics dictionary; reuse_rate is the share of requests served
+            on an already open connection
+        """
+        connections = 0
+        pool_requests = 0
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            pool_requests += pool.num_requests
+
+        result = self.metrics.summary()
+        result['http_version'] = "HTTP/1.1"
+        result['connections'] = connections
+        result['reuse_rate'] = round(1 - connections / pool_requests, 3) if pool_requests else None
+        return result
+
+
+class _WireBytes:
+    """
+    Stand-in for response.raw on responses built by HTTP2Adapter.
+
+    Only tell() is provided, returning the bytes received on the wire
+    before decompression, which is what download progress counts.
+    """
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def tell(self):
+        return self.nbytes
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    Optional HTTP/2 adapter backed by httpx.
+
+    Responses are read fully and handed to requests as already-consumed
+    content. Set-Cookie headers are copied into the session cookie jar,
+    because requests only extracts cookies from urllib3 responses and httpx
+    ignores its own jar when the request already carries a Cookie header.
+    TLS verification and proxies are client-level settings in httpx and
+    use its defaults.
+
+    HTTP/2 is only negotiated over TLS; plain http:// URLs and servers
+    without h2 support fall back to HTTP/1.1, which is reported once and
+    counted per request in report().
+    """
+
+    def __init__(self, timeout=None, pool_maxsize=10, cookies=None, retries=2):
+        """
+        Args:
+            timeout: Default (connect, read) timeout
+            pool_maxsize: Maximum number of connections kept by httpx
+            cookies: Session cookie jar that receives cookies set by the server
+            retries: Retries for connection errors on GET/HEAD
+
+        Raises:
+            ImportError: If httpx is not installed
+        """
+        if httpx is None:
+            raise ImportError("HTTP/2 requires httpx[http2]")
+        super().__init__()
+        self.timeout = timeout
+        self.cookies = cookies
+        self.retries = retries
+        self.metrics = TransportMetrics()
+        self.versions = Counter()
+        self._versions_lock = threading.Lock()
+        self.client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            follow_redirects=False,
+        )
+
+    def _timeout(self, timeout):
+        """Convert a requests-style timeout into httpx.Timeout."""
+        if timeout is None:
+            timeout = self.timeout
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect = read = timeout
+        return httpx.Timeout(read, connect=connect)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        upstream_request = self.client.build_request(
+            request.method, request.url, headers=dict(request.headers),
+            content=request.body, timeout=self._timeout(timeout),
+        )
+        attempts = self.retries + 1 if request.method in ('GET', 'HEAD') else 1
+
+        for attempt in range(attempts):
+            started = time.perf_counter()
+            try:
+                upstream = self.client.send(upstream_request, stream=True)
+                break
+            except httpx.ConnectTimeout as e:
+                error = requests.exceptions.ConnectTimeout(e, request=request)
+            except httpx.ReadTimeout as e:
+                raise requests.exceptions.ReadTimeout(e, request=request)
+            except httpx.TransportError as e:
+                error = requests.exceptions.ConnectionError(e, request=request)
+            if attempt + 1 == attempts:
+                raise error
+            time.sleep(0.5 * 2 ** attempt)
+        self.metrics.record(time.perf_counter() - started)
+        self._record_version(upstream.http_version, request.url)
+
+        try:
+            content = upstream.read()
+        except httpx.ReadTimeout as e:
+            raise requests.exceptions.ReadTimeout(e, request=request)
+        finally:
+            upstream.close()
+
+        response = requests.Response()
+        response.status_code = upstream.status_code
+        response.reason = upstream.reason_phrase
+        response.url = request.url
+        response.request = request
+        response.encoding = upstream.encoding
+        response.connection = self
+        # httpx has already decoded the body
+        response.headers = CaseInsensitiveDict(
+            (k, v) for k, v in upstream.headers.items() if k.lower() != 'content-encoding'
+        )
+        for cookie in upstream.cookies.jar:
+            response.cookies.set_cookie(cookie)
+            if self.cookies is not None:
+                self.cookies.set_cookie(cookie)
+        response._content = content
+        response._content_consumed = True
+        response.raw = _WireBytes(upstream.num_bytes_downloaded)
+        return response
+
+    def _record_version(self, http_version, url):
+        """Count the negotiated protocol and warn the first time it is not HTTP/2."""
+        with self._versions_lock:
+            first_fallback = http_version != "HTTP/2" and not any(
+                version != "HTTP/2" for version in self.versions)
+            self.versions[http_version] += 1
+        if first_fallback:
+            reason = "明文 http:// 不支持 HTTP/2" if url.startswith('http://') \
+                else "服务器未协商 HTTP/2"
+            print(f"{reason}，实际使用 {http_version}")
+
+    def close(self):
+        self.client.close()
+
+    def report(self) -> dict:
+        """
+        Report TTFB and the negotiated protocol; httpx multiplexes streams and
+        does not expose per-pool counters.
+
+        Returns:
+            Metrics dictionary; http_version lists each protocol with its
+            request count when more than one was used
+        """
+        with self._versions_lock:
+            versions = self.versions.most_common()
+        result = self.metrics.summary()
+        if len(versions) == 1:
+            result['http_version'] = versions[0][0]
+        else:
+            result['http_version'] = ", ".join(f"{version} x{count}" for version, count in versions) or None
+        result['connections'] = None
+        result['reuse_rate'] = None
+        return result
+
+
+def build_session(pool_size=10, connect_timeout=10, read_timeout=60, http2=False, retries=2):
+    """
+    Create a requests session tuned for concurrent downloading.
+
+    Args:
+        pool_size: Connections kept per host; match the number of worker threads
+        connect_timeout: Seconds to wait for a connection
+        read_timeout: Seconds to wait between received bytes
+        http2: Use the httpx HTTP/2 adapter when available
+        retries: Retries for connection errors and idempotent 5xx responses
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    timeout = (connect_timeout, read_timeout)
+
+    adapter = None
+    if http2:
+        try:
+            adapter = HTTP2Adapter(timeout=timeout, pool_maxsize=pool_size,
+                                   cookies=session.cookies, retries=retries)
+        except ImportError:
+            print("未安装 httpx[http2]，回退到 HTTP/1.1")
+
+    if adapter is None:
+        retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=0.5,
+                      status_forcelist=(502, 503, 504), allowed_methods=frozenset({'GET', 'HEAD'}))
+        adapter = TunedHTTPAdapter(timeout=timeout, pool_connections=4,
+                                   pool_maxsize=pool_size, max_retries=retry)
+
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def cookie_domain(domain: str) -> str:
+    """
+    Map a browser cookie domain to one the requests cookie jar will send back.
+
+    http.cookiejar rejects single-label domains such as "localhost" or an
+    intranet host name, so requests to them would carry no Cookie header.
+    Those are rewritten to the ".local" form the jar uses as the effective
+    host name; dotted domains and IP addresses are kept as they are.
+
+    Args:
+        domain: Cookie domain as reported by Selenium, with or without a leading dot
+
+    Returns:
+        Domain to store in the requests cookie jar
+    """
+    host = domain.lstrip('.')
+    # IPv4 addresses contain dots and IPv6 addresses colons, so both are kept
+    if not host or '.' in host or ':' in host:
+        return domain
+    return f"{domain}.local"
+
+
+def copy_driver_cookies(session, cookies):
+    """
+    Copy Selenium cookies into a requests session, keeping domain and path.
+
+    Args:
+        session: requests.Session
+        cookies: Result of driver.get_cookies()
+    """
+    for cookie in cookies:
+        rest = {'HttpOnly': None} if cookie.get('httpOnly') else {}
+        session.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie_domain(cookie.get('domain', '')),
+            path=cookie.get('path', '/'),
+            secure=cookie.get('secure', False),
+            expires=cookie.get('expiry'),
+            rest=rest,
+        )
+
+
+def transport_metrics(session) -> dict:
+    """
+    Collect metrics from the adapter mounted on a session.
+
+    Args:
+        session: Session created by build_session
+
+    Returns:
+        Metrics dictionary, or an empty dict for untuned sessions
+    """
+    adapter = session.get_adapter('https://')
+    return adapter.report() if hasattr(adapter, 'report') else {}
@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+
+SNAPSHOT_NAME = ".listing_snapshot.json"
+
+
+class QuestionListParser(HTMLParser):
+    """
+    Extract question rows from the raw HTML of the question list page.
+
+    Mirrors DesunScraper.parse_question_list, but works on a plain HTTP
+    response so polling needs no browser navigation.
+    """
+
+    def __init__(self, page_url):
+        super().__init__(convert_charrefs=True)
+        self.page_url = page_url
+        self.questions = []
+        self._row = None
+        self._cell = 0
+        self._capture = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        element_id = attrs.get('id') or ''
+
+        if tag == 'tr':
+            style = (attrs.get('style') or '').replace(' ', '').lower()
+            self._row = {'id': '', 'name': '', 'answer_url': None, 'requirement_url': None} \
+                if 'color:#000066' in style else None
+            self._cell = 0
+        elif self._row is None:
+            return
+        elif tag == 'td':
+            self._cell += 1
+            if self._cell == 1:
+                self._capture = 'id'
+        elif tag == 'span' and 'LabelA0801' in element_id:
+            self._capture = 'name'
+        elif tag == 'a' and 'HyperLinkShow' in element_id and attrs.get('href'):
+            self._row['answer_url'] = urljoin(self.page_url, attrs['href'])
+        elif tag == 'a' and 'HyperLinkA0801' in element_id and attrs.get('href'):
+            self._row['requirement_url'] = urljoin(self.page_url, attrs['href'])
+
+    def handle_endtag(self, tag):
+        if self._row is None:
+            return
+        if tag in ('td', 'span'):
+            self._capture = None
+        elif tag == 'tr':
+            row = {key: value.strip() if isinstance(value, str) else value
+                   for key, value in self._row.items()}
+            if row['id'] and row['answer_url']:
+                self.questions.append(row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._row is not None and self._capture:
+            self._row[self._capture] += data
+
+
+def parse_question_list_html(html: str, page_url: str) -> list:
+    """
+    Parse question rows from the question list HTML.
+
+    Args:
+        html: Page HTML
+        page_url: URL the page was fetched from, used to resolve links
+
+    Returns:
+        List of question dictionaries with id, name, answer_url and requirement_url
+    """
+    parser = QuestionListParser(page_url)
+    parser.feed(html)
+    parser.close()
+    return parser.questions
+
+
+def row_digest(question: dict) -> str:
+    """
+    Hash a question row so changes to its name or links are detected.
+
+    Args:
+        question: Question dictionary
+
+    Returns:
+        Hex digest string
+    """
+    payload = json.dumps(question, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ListingWatcher:
+    """
+    Poll the question list and process only new or changed rows.
+
+    Each poll is one HTTP request on the scraper's authenticated session,
+    sent with If-None-Match / If-Modified-Since when the server provides
+    validators. An unchanged body hash short-circuits parsing; otherwise
+    rows are compared against the last snapshot, which is persisted in the
+    output root so a restarted watcher resumes where it stopped.
+
+    A row's digest and the page validators are only committed to the
+    snapshot once the row has been downloaded successfully, so failed
+    rows are retried on the next poll.
+    """
+
+    def __init__(self, scraper, interval=300, stop_event=None):
+        """
+        Args:
+            scraper: Logged-in DesunScraper
+            interval: Seconds between polls
+            stop_event: threading.Event that ends the watch loop when set
+        """
+        self.scraper = scraper
+        self.interval = interval
+        self.stop_event = stop_event or threading.Event()
+        self.list_url = f"{scraper.base_url}/Main.aspx?tabindex=1&tabid=6"
+        self.snapshot_path = os.path.join(scraper.download_dir, SNAPSHOT_NAME)
+        self.snapshot = self.load_snapshot()
+        # Validators of the last parsed page, committed after all its rows succeed
+        self._pending = None
+
+    def load_snapshot(self) -> dict:
+        """
+        Load the last listing snapshot.
+
+        Returns:
+            Snapshot dictionary with "etag", "last_modified", "body" and "rows"
+        """
+        empty = {'etag': None, 'last_modified': None, 'body': None, 'rows': {}}
+        if not os.path.exists(self.snapshot_path):
+            return empty
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            return {**empty, **json.load(f)}
+
+    def save_snapshot(self):
+        """Write the current snapshot to the output root."""
+        with open(self.snapshot_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot, f, ensure_ascii=False, indent=2)
+
+    def poll(self) -> list:
+        """
+        Fetch the question list once and diff it against the snapshot.
+
+        Returns:
+            Questions that are new or changed since the last successful poll
+
+        Raises:
+            PermissionError: If the session has expired and the server
+                redirected to the login page
+        """
+        headers = {}
+        if self.snapshot['etag']:
+            headers['If-None-Match'] = self.snapshot['etag']
+        if self.snapshot['last_modified']:
+            headers['If-Modified-Since'] = self.snapshot['last_modified']
+
+        response = self.scraper.session.get(self.list_url, headers=headers)
+        if response.status_code == 304:
+            return []
+        response.raise_for_status()
+        if 'Default.aspx' in response.url:
+            raise PermissionError("登录状态已失效")
+
+        body_digest = hashlib.sha256(response.content).hexdigest()
+        if body_digest == self.snapshot['body']:
+            return []
+
+        questions = parse_question_list_html(response.text, response.url)
+        if not questions:
+            # 错误页或维护页解析不到任何行，保留上次的快照，避免下次全部重新下载
+            print("题目列表为空，可能是错误页或维护页，保留上次的快照")
+            return []
+
+        rows = {question['id']: row_digest(question) for question in questions}
+        # 已从列表中删除的题目不再保留在快照中
+        self.snapshot['rows'] = {qid: digest for qid, digest in self.snapshot['rows'].items()
+                                 if qid in rows}
+        self._pending = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'body': body_digest,
+        }
+        return [question for question in questions
+                if self.snapshot['rows'].get(question['id']) != rows[question['id']]]
+
+    def run(self):
+        """Poll until interrupted or stop_event is set, processing changed rows after each poll."""
+        print(f"监视模式: 每 {self.interval} 秒检查一次题目列表，按 Ctrl+C 退出")
+        relogged = False
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    changed = self.poll()
+                    relogged = False
+                except PermissionError:
+                    # 会话过期时用账号密码重新登录一次；登录后仍被重定向则放弃，避免反复登录
+                    if not (self.scraper.username and self.scraper.password):
+                        print("登录状态已失效，请重新启动监视模式")
+                        return
+                    if relogged:
+                        print("重新登录后仍无法访问题目列表，监视模式已停止")
+                        return
+                    print("登录状态已失效，正在重新登录...")
+                    self.scraper.auto_login()
+                    relogged = True
+                    continue
+                except Exception as e:
+                    print(f"检查题目列表失败: {e}")
+                    changed = None
+
+                if changed is not None:
+                    self.process(changed)
+
+                self.stop_event.wait(self.interval)
+        except KeyboardInterrupt:
+            pass
+        print("\n监视模式已退出")
+
+    def process(self, questions):
+        """
+        Download new or changed questions and record the ones that succeeded.
+
+        Args:
+            questions: Changed questions as returned by poll
+        """
+        if not questions:
+            self.commit()
+            print(f"[{time.strftime('%H:%M:%S')}] 题目列表无变化")
+            return
+
+        mine = self.scraper.filter_questions(questions)
+        mine_ids = {question['id'] for question in mine}
+        print(f"\n[{time.strftime('%H:%M:%S')}] 发现 {len(mine)} 个新增或变更的题目")
+
+        # 其他分片的题目不由本节点处理，直接记为已处理
+        for question in questions:
+            if question['id'] not in mine_ids:
+                self.snapshot['rows'][question['id']] = row_digest(question)
+
+        outcomes = [(question, self.scraper.process_question(question)) for question in mine]
+        if self.scraper.scheduler:
+            self.scraper.scheduler.run()
+
+        failed = 0
+        for question, jobs in outcomes:
+            if jobs is not None and all(job.ok for job in jobs):
+                self.snapshot['rows'][question['id']] = row_digest(question)
+            else:
+                failed += 1
+
+        self.scraper.stats['questions'] += len(mine)
+        self.scraper.write_manifest()
+        if failed:
+            # 不提交页面校验信息，下次轮询会重新比较并重试失败的题目
+            print(f"{failed} 个题目下载失败，将在下次轮询时重试")
+            self.save_snapshot()
+        else:
+            self.commit()
+
+    def commit(self):
+        """Record the validators of the last parsed page and persist the snapshot."""
+        if self._pending:
+            self.snapshot.update(self._pending)
+            self._pending = None
+        self.save_snapshot()